@@ -1,12 +1,26 @@
 from browser import html
 
 from bomberman import constants
+from .timer import Timer
 
-unremoveable_objects = []
+# Interface of a backend, used by bomberman.display through get_backend()
+__all__ = ['Window', 'Timer']
 
 images = {}
 
 
+def load_image(filename, on_load=None):
+    """Return the image of filename, loading it on first use
+    on_load is called once a new image is loaded"""
+    image = images.get(filename)
+    if image is None:
+        image = html.IMG(src=filename)
+        if on_load is not None:
+            image.bind('load', lambda event: on_load())
+        images[filename] = image
+    return image
+
+
 class Window:
     def __init__(self):
         self.canvas = html.CANVAS('Upgrade your browser to play to this bomberman',
@@ -15,58 +29,29 @@ class Window:
             raise RuntimeError('Canvas not supported')
             return
         self.ctx = self.canvas.getContext('2d')
+        self.images = images
+        self.dimensions = list(constants.dimensions)
+
+    def resize(self, dimensions):
+        """Resize the canvas to dimensions, in pixels"""
+        self.dimensions = list(dimensions)
+        self.canvas.width, self.canvas.height = dimensions
 
     def fill(self, color):
         self.ctx.fillStyle = f'rgb({ ", ".join(str(n) for n in color) })'
-        self.ctx.fillRect(0, 0, *constants.dimensions)
-
-
-class GridObject:
-    """GridObject class
-    It is the class of any object in the grid"""
-    def __init__(self, window, grid, pos, reload_grid=True):
-        el = grid.get_element(pos)
-        # Create a GridObject where there is already a Wall is impossible
-        if el is not None and el.__class__ in unremoveable_objects and not el.deletable:
-            self.accepted = False
-            return
-        else:
-            self.accepted = True
-        if el:
-            el.delete()
-
-        self.image = images.get(self.get_image())
-        if self.image is None:
-            filename = self.get_image()
-            self.image = html.IMG(src=filename)
-            images[filename] = self.image
-        self.grid = grid
-        self.gridpos = pos
-        pos = [ p * constants.sprite_size for p in pos ]
-        self.pos = pos
-        self.window = window
-        self.deletable = True
-        grid.add_element(self.gridpos, self, reload_grid)
-
-    def move_obj(self, x, y):
-        self.pos = [self.pos[0] + x, self.pos[0] + y]
-
-    def goto(self, x, y):
-        self.pos = [x, y]
-
-    def display(self):
-        """Display self"""
-        self.pos = [ p * constants.sprite_size for p in self.gridpos ]
-        self.window.ctx.drawImage(self.image, *self.pos)
-
-    def delete(self):
-        pass
-
-def game_over(window, grid, player):
-    """When called, show the constants.game_over_image image"""
-    grid.cancel_timers()
-    grid.data = {}
-    grid.reload()
-    player.continue_ = False
-    window.fill(constants.background_color)
-    window.ctx.drawImage(html.IMG(src=constants.game_over_image), 0, constants.dimensions[1] / 2)
+        self.ctx.fillRect(0, 0, *self.dimensions)
+
+    def draw(self, filename, pos):
+        self.ctx.drawImage(load_image(filename), *pos)
+
+    def clear_cell(self, gridpos):
+        """Fill a cell of the grid with the background color"""
+        self.ctx.fillStyle = f'rgb({ ", ".join(str(n) for n in constants.background_color) })'
+        self.ctx.fillRect(gridpos[0] * constants.sprite_size, gridpos[1] * constants.sprite_size,
+                          constants.sprite_size, constants.sprite_size)
+
+    def draw_cell(self, gridpos, filename):
+        """Draw an image in a cell of the grid"""
+        self.clear_cell(gridpos)
+        self.draw(filename, [gridpos[0] * constants.sprite_size,
+                             gridpos[1] * constants.sprite_size])
@@ -0,0 +1,16 @@
+from browser.timer import clear_timeout, set_timeout
+
+
+class Timer:
+    """Timer class
+    Same interface as threading.Timer, based on set_timeout"""
+    def __init__(self, interval, function):
+        self.interval = interval
+        self.function = function
+        self._tid = None
+
+    def start(self):
+        self._tid = set_timeout(self.function, self.interval * 1000)
+
+    def cancel(self):
+        clear_timeout(self._tid)
@@ -0,0 +1,34 @@
+from bomberman import constants
+
+try:
+    import browser
+except ImportError:
+    # CPython, e.g. python -m bomberman.simulation
+    from threading import Timer
+else:
+    # Brython's threads run their function at once: timers must be scheduled
+    if not browser.is_webworker:
+        raise ImportError('In Brython, the headless backend only runs in a web worker')
+    from .timer import Timer
+
+# Interface of a backend, used by bomberman.display through get_backend()
+__all__ = ['Window', 'Timer']
+
+
+class Window:
+    """Window class
+    Nothing is drawn. on_redraw is called each time the grid is redrawn"""
+    def __init__(self, on_redraw=None):
+        self.on_redraw = on_redraw
+        self.images = {}
+        self.dimensions = list(constants.dimensions)
+
+    def resize(self, dimensions):
+        self.dimensions = list(dimensions)
+
+    def fill(self, color):
+        if self.on_redraw is not None:
+            self.on_redraw()
+
+    def draw(self, filename, pos):
+        pass
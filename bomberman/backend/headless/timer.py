@@ -0,0 +1,18 @@
+from browser import self as worker
+
+
+class Timer:
+    """Timer class
+    Same interface as threading.Timer, based on the setTimeout of the web
+    worker: browser.timer needs browser.window, which workers do not have"""
+    def __init__(self, interval, function):
+        self.interval = interval
+        self.function = function
+        self._tid = None
+
+    def start(self):
+        self._tid = worker.setTimeout(self.function, self.interval * 1000)
+
+    def cancel(self):
+        if self._tid is not None:
+            worker.clearTimeout(self._tid)
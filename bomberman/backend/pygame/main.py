@@ -1,67 +1,105 @@
 #! /usr/bin/env python3
 
+import logging
+import time
+
 import pygame
 from pygame import locals as l
 
-from ... import common, constants, display
+from ... import common, constants, diagnostics, display
+
+# pygame key names which are not a letter or a digit -> KeyboardEvent.code
+key_codes = {
+    'up': 'ArrowUp',
+    'down': 'ArrowDown',
+    'left': 'ArrowLeft',
+    'right': 'ArrowRight',
+    'space': 'Space',
+    'return': 'Enter',
+}
+
+def key_code(key):
+    """Return the KeyboardEvent.code of a pygame key, as in constants.key_bindings"""
+    name = pygame.key.name(key)
+    if len(name) == 1 and name.isalpha():
+        return 'Key' + name.upper()
+    elif len(name) == 1 and name.isdigit():
+        return 'Digit' + name
+    return key_codes.get(name, name)
+
+def main(start_time=None):
+    """Run the game
+    start_time is the time.perf_counter() value at launch, used to measure the
+    cold start"""
+    if start_time is None:
+        start_time = time.perf_counter()
 
-def main():
     # Init
-    pygame.init()
+    display.use_backend('pygame')
+    # Only the display is used: do not initialize the other pygame modules
+    pygame.display.init()
     window = display.Window()
-    window.pygame_window.fill(constants.background_color)
+    window.fill(constants.background_color)
 
     # Title
     pygame.display.set_caption(constants.title)
+    pygame.display.flip()
     
     pygame.key.set_repeat(400, 30)
-    pygame.time.Clock().tick(30)
+    clock = pygame.time.Clock()
     
     grid = common.Grid(window)
     
     level = common.Level(window, grid, constants.level_file)
     level.render()
     players = level.players
+    registry = common.PlayerRegistry(players)
+    pygame.display.flip()
+
+    server = None
+    if constants.remote_port is not None:
+        from ... import network
+        server = network.InputServer(registry)
+
+    if constants.DEBUG:
+        # Overload events of the watchdog
+        logging.basicConfig(level=logging.INFO)
+        cold_start = time.perf_counter() - start_time
+        print(f'Cold start: { cold_start:.3f} s (target: { constants.cold_start_target } s)')
     
     # Main loop
     continue_ = True
+    frame = 0
     while continue_:
-        pygame.display.flip()
+        # Overloaded, frames are skipped to leave time to the timers
+        frame += 1
+        if not grid.watchdog.overloaded or frame % constants.overload_frame_skip == 0:
+            with grid.watchdog.measure('render'):
+                pygame.display.flip()
         for event in pygame.event.get():
             if event.type == l.QUIT or (event.type == l.KEYDOWN and event.key == l.K_ESCAPE):
                 continue_ = False
+                for bot in level.bots:
+                    bot.stop()
                 grid.cancel_timers()
+                if server is not None:
+                    server.close()
                 pygame.quit()
                 break
             elif event.type == l.KEYDOWN and all([ p.continue_ for p in players]):
-                if event.key == l.K_RIGHT:
-                    players[0].move(1, 0)
-                elif event.key == l.K_d:
-                    if len(players) > 1:
-                        players[1].move(1, 0)
-                elif event.key == l.K_LEFT:
-                    players[0].move(-1, 0)
-                elif event.key == l.K_a:
-                    if len(players) > 1:
-                        players[1].move(-1, 0)
-                elif event.key == l.K_UP:
-                    players[0].move(0, -1)
-                elif event.key == l.K_w:
-                    if len(players) > 1:
-                        players[1].move(0, -1)
-                elif event.key == l.K_DOWN:
-                    players[0].move(0, 1)
-                elif event.key == l.K_s:
-                    if len(players) > 1:
-                        players[1].move(0, 1)
-                elif event.key == l.K_SPACE:
-                    players[0].put_bomb()
-                elif event.key == l.K_x:
-                    if len(players) > 1:
-                        players[1].put_bomb()
-                elif event.key == l.K_p:
+                if event.key == l.K_p:
                     import pdb; pdb.set_trace()
+                elif event.key == l.K_m and constants.DEBUG:
+                    print(diagnostics.format_memory_report(diagnostics.memory_report(grid)))
+                else:
+                    registry.key(key_code(event.key))
+
+        if server is not None and continue_:
+            server.poll()
 
         if continue_ and not all([ p.continue_ for p in players]):
-            window.pygame_window.fill(constants.background_color)
-            window.pygame_window.blit(pygame.image.load(constants.game_over_image), [0, 181])
+            window.fill(constants.background_color)
+            window.draw(constants.game_over_image, constants.game_over_position)
+
+        if continue_:
+            clock.tick(constants.frame_rate)
@@ -0,0 +1,305 @@
+#! /usr/bin/env python3
+"""Bot players
+A Bot plays a Player. Every constants.bot_decision_delay seconds, it copies
+the game into a GameState and plays the first action of the best sequence
+found by a beam search over copies of that state"""
+
+import heapq
+import math
+import time
+
+from . import common, constants
+
+# (move, put a bomb before moving)
+ACTIONS = [(move, bomb) for bomb in (False, True)
+           for move in ((1, 0), (-1, 0), (0, 1), (0, -1), (0, 0))]
+
+DEAD = -1e9
+GOAL_REACHED = 1e6
+
+
+def steps(seconds, round_up=True):
+    """Return the number of bot decisions taking seconds
+    A decision also takes up to constants.bot_time_budget to plan. Round down
+    for what is dangerous when it ends, such as bomb fuses"""
+    decisions = seconds / (constants.bot_decision_delay + constants.bot_time_budget)
+    return max(1, math.ceil(decisions) if round_up else int(decisions))
+
+
+class GameState:
+    """GameState class
+    Cheap model of the game seen by a player, advanced one decision at a
+    time. Walls, goals, robots and other players do not move. Bombs are
+    {position: decisions before explosion}, fires {position: decisions
+    before disappearing}"""
+    def __init__(self, size, walls, goals, blocked, robots, destructible, bombs, fires,
+                 position, pending_bomb=None):
+        self.size = size
+        self.walls = walls
+        self.goals = goals
+        self.blocked = blocked
+        self.robots = robots
+        self.destructible = destructible
+        self.bombs = bombs
+        self.fires = fires
+        self.position = position
+        self.pending_bomb = pending_bomb
+        self.dead = False
+        self.goal_reached = False
+        self.destroyed = 0
+        self.hits = 0
+
+    @classmethod
+    def from_level(cls, level, player):
+        """Return the state of level as seen by player"""
+        walls, goals, blocked, robots, destructible = set(), set(), set(), set(), set()
+        bombs, fires = {}, {}
+        now = time.monotonic()
+        for pos, el in list(level.grid.data.items()):
+            if isinstance(el, common.DestructibleWall):
+                destructible.add(pos)
+            elif isinstance(el, common.Wall):
+                walls.add(pos)
+            elif isinstance(el, common.Goal):
+                goals.add(pos)
+            elif isinstance(el, common.Robot):
+                robots.add(pos)
+            elif isinstance(el, common.Bomb) and not el.exploded and el.explosion_time is not None:
+                bombs[pos] = steps(el.explosion_time - now, False)
+            elif isinstance(el, common.Fire):
+                fires[pos] = steps(constants.bomb_explosion_duration)
+            elif el is not player:
+                blocked.add(pos)
+        pending_bomb = tuple(player.bombpos) if player.bombpos else None
+        return cls(tuple(level.grid.size), frozenset(walls), frozenset(goals), frozenset(blocked),
+                   frozenset(robots), destructible, bombs, fires, tuple(player.gridpos), pending_bomb)
+
+    def clone(self):
+        state = GameState(self.size, self.walls, self.goals, self.blocked, self.robots,
+                          self.destructible, dict(self.bombs), dict(self.fires),
+                          self.position, self.pending_bomb)
+        state.dead = self.dead
+        state.goal_reached = self.goal_reached
+        state.destroyed = self.destroyed
+        state.hits = self.hits
+        return state
+
+    def key(self):
+        """Return what tells states apart in a search"""
+        return self.position, self.pending_bomb, tuple(sorted(self.bombs))
+
+    def free(self, pos):
+        """Return True if a player can go to pos"""
+        return (0 <= pos[0] < self.size[0] and 0 <= pos[1] < self.size[1] and
+                pos not in self.walls and pos not in self.destructible and
+                pos not in self.blocked and pos not in self.robots and pos not in self.bombs)
+
+    def blast(self, pos):
+        """Return the positions reached by the explosion of a bomb at pos
+        Same rules as Bomb.explode"""
+        cells = []
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            for i in range(1, constants.bomb_explosion_scope):
+                p = (pos[0] + dx * i, pos[1] + dy * i)
+                if p in self.walls:
+                    break
+                cells.append(p)
+                if p in self.destructible:
+                    break
+        return cells
+
+    def step(self, action):
+        """Play action then let a decision delay pass"""
+        move, bomb = action
+        if bomb:
+            self.pending_bomb = self.position
+        if move != (0, 0):
+            new_pos = (self.position[0] + move[0], self.position[1] + move[1])
+            if new_pos in self.fires:
+                self.dead = True
+            elif new_pos in self.goals:
+                self.goal_reached = True
+            elif self.free(new_pos):
+                self.position = new_pos
+                # The bomb is put when the player moves
+                if self.pending_bomb is not None:
+                    self.bombs[self.pending_bomb] = steps(constants.bomb_explosion_delay, False)
+                    self.pending_bomb = None
+
+        self.fires = {pos: left - 1 for pos, left in self.fires.items() if left > 1}
+        exploding = [pos for pos, fuse in self.bombs.items() if fuse <= 1]
+        for pos in self.bombs:
+            self.bombs[pos] -= 1
+        while exploding:
+            pos = exploding.pop()
+            if pos not in self.bombs:
+                continue
+            del self.bombs[pos]
+            for p in self.blast(pos):
+                # The sets may be shared with other states
+                if p in self.destructible:
+                    self.destructible = self.destructible - {p}
+                    self.destroyed += 1
+                elif p in self.robots:
+                    self.robots = self.robots - {p}
+                    self.destroyed += 1
+                if p in self.bombs:
+                    # Chain explosion
+                    exploding.append(p)
+                self.fires[p] = steps(constants.bomb_explosion_duration)
+
+        if self.position in self.fires:
+            self.dead = True
+        x, y = self.position
+        for p in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if p in self.robots:
+                self.hits += 1
+
+    def evaluate(self, distances):
+        """Return the score of the state, the higher the better
+        distances gives the distance of each position to the nearest goal"""
+        if self.dead:
+            return DEAD
+        if self.goal_reached:
+            return GOAL_REACHED
+        distance = distances.get(self.position, len(distances) + 1)
+        score = -10 * distance + 20 * self.destroyed - 100 * self.hits
+        for pos, fuse in self.bombs.items():
+            blast = self.blast(pos)
+            # Bombs usually explode after the search depth: they are worth the
+            # robots and the walls on the way to the goal they will destroy
+            for p in blast:
+                if ((p in self.destructible or p in self.robots) and
+                    distances.get(p, distance) < distance):
+                    score += 20 * constants.bot_wall_cost
+            if self.position in blast:
+                score -= 300 / max(fuse, 1)
+        return score
+
+
+def goal_distances(state):
+    """Return the cost to reach the nearest goal from every position
+    Destructible walls and robots cost constants.bot_wall_cost: a bomb is
+    needed"""
+    distances = {}
+    queue = [(0, goal) for goal in state.goals]
+    heapq.heapify(queue)
+    while queue:
+        distance, pos = heapq.heappop(queue)
+        if pos in distances:
+            continue
+        distances[pos] = distance
+        for p in ((pos[0] + 1, pos[1]), (pos[0] - 1, pos[1]),
+                  (pos[0], pos[1] + 1), (pos[0], pos[1] - 1)):
+            if (p in distances or p in state.walls or
+                not (0 <= p[0] < state.size[0] and 0 <= p[1] < state.size[1])):
+                continue
+            cost = constants.bot_wall_cost if p in state.destructible or p in state.robots else 1
+            heapq.heappush(queue, (distance + cost, p))
+    return distances
+
+
+def search(state, action, distances, depth, beam_width, time_budget):
+    """Return the best value reachable in depth decisions starting with action
+    The value of a sequence is the sum of the scores of its states, so that
+    what is done sooner counts more. Beam search: only the beam_width best
+    states are expanded at each depth"""
+    deadline = time.perf_counter() + time_budget
+    first = state.clone()
+    first.step(action)
+    beam = [(first.evaluate(distances), first)]
+    for i in range(1, depth):
+        candidates = {}
+        for value, s in beam:
+            if s.dead or s.goal_reached:
+                candidates[s.key()] = (value + s.evaluate(distances), s)
+                continue
+            for a in ACTIONS:
+                child = s.clone()
+                child.step(a)
+                # Different actions often lead to the same state
+                key = child.key()
+                child_value = value + child.evaluate(distances)
+                if key not in candidates or candidates[key][0] < child_value:
+                    candidates[key] = (child_value, child)
+        beam = sorted(candidates.values(), key=lambda c: c[0], reverse=True)[:beam_width]
+        if time.perf_counter() > deadline:
+            break
+    return beam[0][0]
+
+
+class Bot:
+    """Bot class
+    It plays player. With processes, the first actions are searched in
+    parallel by a pool of processes"""
+    def __init__(self, level, player, depth=None, beam_width=None, time_budget=None,
+                 processes=None):
+        self.level = level
+        self.player = player
+        self.depth = depth or constants.bot_search_depth
+        self.beam_width = beam_width or constants.bot_beam_width
+        self.time_budget = time_budget or constants.bot_time_budget
+        self.processes = processes if processes is not None else constants.bot_processes
+        self.executor = None
+        self.timer = None
+        self.running = False
+        player.bot = self
+
+    def decide(self):
+        """Return the action to play
+        While the game is overloaded, the search is half as deep and wide"""
+        state = GameState.from_level(self.level, self.player)
+        distances = goal_distances(state)
+        depth, beam_width, time_budget = self.depth, self.beam_width, self.time_budget
+        if self.level.grid.watchdog.overloaded:
+            depth, beam_width, time_budget = max(2, depth // 2), max(2, beam_width // 2), time_budget / 2
+        n = len(ACTIONS)
+        executor = self.executor
+        if executor is not None:
+            # The searches run by rounds of self.processes
+            budget = time_budget / math.ceil(n / self.processes)
+            scores = list(executor.map(search, [state] * n, ACTIONS, [distances] * n,
+                                            [depth] * n, [beam_width] * n, [budget] * n))
+        else:
+            budget = time_budget / n
+            scores = [search(state, a, distances, depth, beam_width, budget)
+                      for a in ACTIONS]
+        return ACTIONS[scores.index(max(scores))]
+
+    def play(self):
+        """Play an action and plan the next one"""
+        if not self.running:
+            return
+        if not all(p.continue_ for p in self.level.players):
+            self.stop()
+            return
+        try:
+            move, bomb = self.decide()
+        except RuntimeError:
+            # The process pool was shut down by stop while planning
+            if self.running:
+                raise
+            return
+        if bomb:
+            self.player.put_bomb()
+        if move != (0, 0):
+            self.player.move(*move)
+        if self.running:
+            self.timer = self.level.grid.start_timer(constants.bot_decision_delay, self.play, 'bot')
+
+    def start(self):
+        if self.processes and self.executor is None:
+            # Started now, so that the first decisions are not late
+            from concurrent.futures import ProcessPoolExecutor
+            self.executor = ProcessPoolExecutor(self.processes)
+        self.running = True
+        self.timer = self.level.grid.start_timer(constants.bot_decision_delay, self.play, 'bot')
+
+    def stop(self):
+        self.running = False
+        if self.timer is not None:
+            self.level.grid.cancel_timer(self.timer)
+            self.timer = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
@@ -3,9 +3,11 @@
 
 import json
 import random
+import time
 
 from . import constants
 from .display import game_over, GridObject, Timer
+from .watchdog import Watchdog
 
 class LevelError(Exception):
     pass
@@ -18,7 +20,14 @@ class Grid:
     def __init__(self, window):
         self.data = {}
         self.window = window
-        self.all_timers = []
+        # Number of columns and rows, set by the level
+        self.size = [constants.dimensions[0] // constants.sprite_size,
+                     constants.dimensions[1] // constants.sprite_size]
+        # Pending timers, removed once they have run
+        self.all_timers = set()
+        self.watchdog = Watchdog()
+        # Redraw put off while the game is overloaded
+        self.redraw_timer = None
 
     def add_element(self, position, element, reload=True):
         """Add an element to the grid"""
@@ -54,6 +63,10 @@ class Grid:
             self.clear_position(pos, False)
         self.reload()
 
+    def in_grid(self, position):
+        """Return True if position is inside the grid"""
+        return 0 <= position[0] < self.size[0] and 0 <= position[1] < self.size[1]
+
     def get_element(self, position):
         """Get a GridObject
         Return None if there is nothing"""
@@ -63,67 +76,114 @@ class Grid:
         else:
             return None
 
+    def start_timer(self, interval, function, stage='timer'):
+        """Call function after interval seconds
+        The timer is forgotten once it has run. The call is measured by the
+        watchdog as a tick of stage"""
+        def run():
+            self.all_timers.discard(timer)
+            with self.watchdog.measure(stage, time.monotonic() - due):
+                function()
+
+        due = time.monotonic() + interval
+        timer = Timer(interval, run)
+        self.all_timers.add(timer)
+        timer.start()
+        return timer
+
+    def cancel_timer(self, timer):
+        """Cancel a timer started by start_timer and forget it"""
+        timer.cancel()
+        self.all_timers.discard(timer)
+
     def cancel_timers(self):
         """Cancel all timers
         Used to prevent errors when the game is exited"""
-        for t in self.all_timers:
+        for t in list(self.all_timers):
             t.cancel()
+        self.all_timers.clear()
+        self.redraw_timer = None
+
+    def reload(self, force=False):
+        """Reload the grid
+        While the game is overloaded, the redraws coming too soon are put off
+        and done at once, unless force is True"""
+        if not force:
+            delay = self.watchdog.redraw_delay()
+            if delay > 0:
+                if self.redraw_timer is None:
+                    self.redraw_timer = self.start_timer(delay, self.deferred_reload, None)
+                return
 
-    def reload(self):
-        """Reload the grid"""
+        with self.watchdog.measure('render'):
+            self.watchdog.redrawn()
+            # Fill the window and call display for each element
+            self.window.fill(constants.background_color)
+            for i in list(self.data.values()):
+                i.display()
 
-        # Fill the window and call display for each element
-        self.window.fill(constants.background_color)
-        for i in list(self.data.values()):
-            i.display()
+    def deferred_reload(self):
+        self.redraw_timer = None
+        self.reload(True)
 
 
 class Level:
     """Level class
     It creates the grid objects"""
-    def __init__(self, window, grid, file):
+    def __init__(self, window, grid, file=None, data=None):
+        """Load a level from file, or from data (the content of a level
+        file) when it is given"""
         self.window = window
         self.grid = grid
 
         self.players = []
-        self.walls = []
-        self.destroyable_walls = []
-        self.goals = []
         self.robots = []
-
-        with open(file) as f:
-            level = json.loads(f.read())
-            self.level_map = level['map']
-            if 'robots' in level:
-                self.robots_data = level['robots']
-            else:
-                self.robots_data = None
+        self.bots = []
+
+        if data is None:
+            with open(file) as f:
+                data = f.read()
+        level = json.loads(data)
+        self.level_map = level['map']
+        if 'robots' in level:
+            self.robots_data = level['robots']
+        else:
+            self.robots_data = None
 
     def render(self):
         """Render level
         Level are text files
         . represents the start point of a player
+        * represents the start point of a player played by a bot
         # a wall
         : a wall which can be destroyed with a bomb
         + is the goal
         Robots are represented by letters which are keys of the 'robots' """
 
+        # Walls and goals are only kept by the grid, so that they are released
+        # once destroyed
         matching_dict = {
-            '.': ('players', Player),
-            '#': ('walls', Wall),
-            ':': ('destroyable_walls', DestructibleWall),
-            '+': ('goals', Goal),
+            '#': Wall,
+            ':': DestructibleWall,
+            '+': Goal,
         }
         robots_positions = []
-        for l in range(0, 15):
-            for c in range(0, 15):
-                cell = self.level_map[l][c]
+        bot_players = []
+        self.grid.size = [max(len(row) for row in self.level_map), len(self.level_map)]
+        self.window.resize([n * constants.sprite_size for n in self.grid.size])
+        for l, row in enumerate(self.level_map):
+            for c, cell in enumerate(row):
                 if cell in list('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'):
                     robots_positions.append([cell, (c, l)])
+                elif cell in '.*':
+                    player = Player(self.window, self.grid, [c, l], False)
+                    self.players.append(player)
+                    if cell == '*':
+                        bot_players.append(player)
                 else:
-                    class_classname = matching_dict.get(cell)
-                    if class_classname is not None:
-                        getattr(self, class_classname[0]).append(class_classname[1](self.window, self.grid, [c, l], False))
+                    class_ = matching_dict.get(cell)
+                    if class_ is not None:
+                        class_(self.window, self.grid, [c, l], False)
 
         robot_classes = {
             'orientation': OrientationRobot,
@@ -141,11 +201,9 @@ class Level:
                 if 'type' not in robot_data:
                     raise LevelError(f'No type in { r[0] } data')
                 else:
-                    robot = robot_classes[robot_data['type']](self.window, self.grid, r[1])
+                    robot = robot_classes[robot_data['type']](self.window, self.grid, r[1], reload_grid=False)
                     self.robots.append(robot)
-                    if robot_data['type'] in ['orientation', 'timid']:
-                        robot.player = random.choice(self.players)
-                    elif robot_data['type'] == 'path':
+                    if robot_data['type'] == 'path':
                         robot.path = robot_data['path']
                     elif robot_data['type'] == 'randompath':
                         random_path_robot.append(robot)
@@ -154,26 +212,215 @@ class Level:
         for r in random_path_robot:
             r.create_path()
 
-        self.robots_move_timer = Timer(constants.robot_move_delay, self.move_robots)
-        self.grid.all_timers.append(self.robots_move_timer)
-        self.robots_move_timer.start()
+        self.robots_move_timer = self.grid.start_timer(constants.robot_move_delay, self.move_robots, 'robots')
 
-    def move_robots(self):
-        i = 0
-        while i < len(self.robots):
-            r = self.robots[i]
-            if not r.exploded:
-                r.move()
-                i += 1
-            else:
-                del self.robots[i]
+        if bot_players:
+            from .bots import Bot
+            for p in bot_players:
+                bot = Bot(self, p)
+                self.bots.append(bot)
+                bot.start()
 
-        self.robots_move_timer = Timer(constants.robot_move_delay, self.move_robots)
-        self.grid.all_timers.append(self.robots_move_timer)
-        self.robots_move_timer.start()
+    def move_robots(self):
+        """Move all the robots
+        Robots are updated together: the free neighbours of every robot are
+        gathered first, then the moves are applied in order. A robot only goes
+        to a cell which is still free, so when several robots want the same
+        cell, the first one gets it and the others stay in place."""
+        # Drop the robots which exploded since the last move in one sweep
+        self.robots = [r for r in self.robots if not r.exploded]
+
+        data = self.grid.data
+        columns, rows = self.grid.size
+        neighbours = []
+        for r in self.robots:
+            x, y = r.gridpos
+            possible_places = []
+            for p in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                el = data.get(p)
+                if el is None:
+                    if 0 <= p[0] < columns and 0 <= p[1] < rows:
+                        possible_places.append(list(p))
+                elif r.attacks and isinstance(el, Player):
+                    el.attack()
+                    # A player died: the game is over and the grid has been cleared
+                    if self.grid.data is not data:
+                        return
+            neighbours.append(possible_places)
+
+        # Robots chasing or fleeing a player target the nearest live one
+        players = PlayerIndex((p for p in self.players if p.continue_), self.grid.size)
+        for r in self.robots:
+            if r.targets_player:
+                r.player = players.nearest(r.gridpos)
+
+        for r, possible_places in zip(self.robots, neighbours):
+            if not possible_places:
+                continue
+            new_gridpos = r.choose_position(possible_places)
+            # None means not to move
+            if new_gridpos is None:
+                continue
+            if new_gridpos not in possible_places:
+                print(f'choose_position returned a value ({ new_gridpos }) that is not in possible_places ({ possible_places })')
+                continue
+            new_gridpos = list(new_gridpos)
+            # Taken by a robot which moved before, or changed by a timer since
+            # the neighbours were gathered
+            if r.exploded or data.get(tuple(r.gridpos)) is not r or tuple(new_gridpos) in data:
+                continue
+            old_gridpos = r.gridpos
+            r.goto(new_gridpos[0] * constants.sprite_size,
+                   new_gridpos[1] * constants.sprite_size)
+            self.grid.move_element(old_gridpos, r, new_gridpos, False)
+            r.gridpos = new_gridpos
+            r.on_move(list(old_gridpos))
+
+        self.robots_move_timer = self.grid.start_timer(constants.robot_move_delay, self.move_robots, 'robots')
         self.grid.reload()
 
 
+class PlayerIndex:
+    """PlayerIndex class
+    Spatial hash of players, to find the nearest one without comparing the
+    distance to every player. size is the number of columns and rows of the
+    grid"""
+    # Up to this number of players, comparing them all is faster
+    linear_players = 24
+
+    def __init__(self, players, size, bucket_size=None):
+        self.players = list(players)
+        if bucket_size is None:
+            # About one player per bucket when they are spread over the grid
+            bucket_size = max(1, int((size[0] * size[1] / max(1, len(self.players))) ** 0.5))
+        self.bucket_size = bucket_size
+        self.buckets = {}
+        for p in self.players:
+            key = (p.gridpos[0] // self.bucket_size, p.gridpos[1] // self.bucket_size)
+            self.buckets.setdefault(key, []).append(p)
+        if self.buckets:
+            self.bounds = [min(k[0] for k in self.buckets), min(k[1] for k in self.buckets),
+                           max(k[0] for k in self.buckets), max(k[1] for k in self.buckets)]
+
+    def ring(self, bx, by, ring):
+        """Return the keys of the buckets at ring from (bx, by) which may
+        hold players"""
+        if ring == 0:
+            return [(bx, by)]
+        min_x, min_y, max_x, max_y = self.bounds
+        keys = []
+        xs = range(max(bx - ring, min_x), min(bx + ring, max_x) + 1)
+        for y in (by - ring, by + ring):
+            if min_y <= y <= max_y:
+                keys.extend((x, y) for x in xs)
+        ys = range(max(by - ring + 1, min_y), min(by + ring - 1, max_y) + 1)
+        for x in (bx - ring, bx + ring):
+            if min_x <= x <= max_x:
+                keys.extend((x, y) for y in ys)
+        return keys
+
+    def linear_nearest(self, position):
+        """Return the nearest player of position, comparing every player"""
+        return min(self.players, key=lambda p: (p.gridpos[0] - position[0]) ** 2 +
+                                               (p.gridpos[1] - position[1]) ** 2)
+
+    def nearest(self, position):
+        """Return the nearest player of position, None if there is no player"""
+        if not self.buckets:
+            return None
+        if len(self.players) <= self.linear_players:
+            return self.linear_nearest(position)
+        size = self.bucket_size
+        bx, by = position[0] // size, position[1] // size
+        max_ring = max(bx - self.bounds[0], by - self.bounds[1],
+                       self.bounds[2] - bx, self.bounds[3] - by)
+
+        nearest = None
+        nearest_distance = None
+        visited = 0
+        for ring in range(max_ring + 1):
+            keys = self.ring(bx, by, ring)
+            visited += len(keys)
+            # Far from clustered players: comparing them all is cheaper
+            if visited > len(self.players):
+                return self.linear_nearest(position)
+            for key in keys:
+                for p in self.buckets.get(key, ()):
+                    distance = (p.gridpos[0] - position[0]) ** 2 + (p.gridpos[1] - position[1]) ** 2
+                    if nearest is None or distance < nearest_distance:
+                        nearest = p
+                        nearest_distance = distance
+            # Players in the next rings are more than ring * size away
+            if nearest is not None and nearest_distance <= (ring * size) ** 2:
+                break
+        return nearest
+
+
+class PlayerRegistry:
+    """PlayerRegistry class
+    It gives their inputs to the players: local keys, bound with
+    constants.key_bindings to the players which are not bots, and remote
+    inputs"""
+    moves = {
+        'right': (1, 0),
+        'left': (-1, 0),
+        'up': (0, -1),
+        'down': (0, 1),
+    }
+
+    def __init__(self, players, key_bindings=None):
+        self.players = players
+        if key_bindings is None:
+            key_bindings = constants.key_bindings
+        # Key code -> (player number, action)
+        self.key_map = {}
+        humans = [number for number, p in enumerate(players) if p.bot is None]
+        for number, bindings in zip(humans, key_bindings):
+            for code, action in bindings.items():
+                self.key_map[code] = (number, action)
+        self.local_players = {number for number, action in self.key_map.values()}
+        self.remote_players = set()
+
+    def act(self, number, action):
+        """Make the player number do action (up, down, left, right or bomb)
+        Return False if there is no such player or action, or if the player
+        is a bot"""
+        if not 0 <= number < len(self.players) or self.players[number].bot is not None:
+            return False
+        # The game is over
+        if not all(p.continue_ for p in self.players):
+            return False
+        player = self.players[number]
+        if action == 'bomb':
+            player.put_bomb()
+        elif action in self.moves:
+            player.move(*self.moves[action])
+        else:
+            return False
+        return True
+
+    def key(self, code):
+        """Handle a key press, code being a KeyboardEvent.code
+        Return False if the key is not bound"""
+        if code not in self.key_map:
+            return False
+        return self.act(*self.key_map[code])
+
+    def claim(self):
+        """Return the number of a player which is neither bound to keys nor
+        already remote, None if there is none"""
+        for number in range(len(self.players)):
+            if (number not in self.local_players and number not in self.remote_players and
+                self.players[number].bot is None):
+                self.remote_players.add(number)
+                return number
+        return None
+
+    def release(self, number):
+        """Release a remote player"""
+        self.remote_players.discard(number)
+
+
 class Goal(GridObject):
     """Goal class
     It is the goal of the game, where player must go"""
@@ -194,16 +441,16 @@ class Player(GridObject):
         self.continue_ = True
         self.bombpos = None
         self.deletable = False
+        # Bot playing this player, if any
+        self.bot = None
 
     def move(self, move_x, move_y):
         """Move player
         Called when arrows keys are pressed"""
+        new_pos = [self.gridpos[0] + move_x, self.gridpos[1] + move_y]
         # Verify player can go there
-        if (self.gridpos[0] + move_x < 0 or self.gridpos[1] + move_y < 0 or
-            (self.gridpos[0] + move_x) * constants.sprite_size >= constants.dimensions[0] or
-            (self.gridpos[1] + move_y) * constants.sprite_size >= constants.dimensions[1]):
+        if not self.grid.in_grid(new_pos):
             return
-        new_pos = [self.gridpos[0] + move_x, self.gridpos[1] + move_y]
         el = self.grid.get_element(new_pos)
         if isinstance(el, Goal):
             self.move_obj(move_x * constants.sprite_size, move_y * constants.sprite_size)
@@ -248,7 +495,7 @@ class Player(GridObject):
         # In brython version, the timers are not cancelled so the screen is
         # redrawn when the bomb has finished to explode. So we wait before
         # showing the "Game over!" text.
-        Timer(constants.bomb_explosion_duration, lambda: game_over(self.window, self.grid, self)).start()
+        self.grid.start_timer(constants.bomb_explosion_duration, lambda: game_over(self.window, self.grid, self))
 
 
 class Bomb(GridObject):
@@ -259,15 +506,15 @@ class Bomb(GridObject):
         self.deletable = False
         self.exploded = False
         self.fires = []
+        self.explosion_time = None
 
     def get_image(self):
         return constants.bomb_image
 
     def start_timer(self):
         """Start bomb timer"""
-        timer = Timer(constants.bomb_explosion_delay, self.explode)
-        self.grid.all_timers.append(timer)
-        timer.start()
+        self.explosion_time = time.monotonic() + constants.bomb_explosion_delay
+        self.grid.start_timer(constants.bomb_explosion_delay, self.explode)
 
     def explode(self):
         """Explode"""
@@ -289,13 +536,13 @@ class Bomb(GridObject):
                         break
                     else:
                         self.fires.append(Fire(self.window, self.grid, p, False))
-            timer = Timer(constants.bomb_explosion_duration, self.delete)
-            self.grid.all_timers.append(timer)
-            timer.start()
+            self.grid.start_timer(constants.bomb_explosion_duration, self.delete)
         self.grid.reload()
 
     def delete(self):
         self.grid.clear_position(self.gridpos)
+        # The fires delete themselves
+        self.fires = []
         self.grid.reload()
 
     def on_explode(self):
@@ -314,15 +561,14 @@ class Fire(GridObject):
                 return
         super().__init__(window, grid, pos, reload_grid)
         if self.accepted:
-            self.timer = Timer(constants.bomb_explosion_duration, self.delete)
-            grid.all_timers.append(self.timer)
-            self.timer.start()
+            self.timer = grid.start_timer(constants.bomb_explosion_duration, self.delete)
 
     def get_image(self):
         return constants.fire_image
 
     def delete(self):
         self.grid.clear_position(self.gridpos)
+        self.timer = None
         self.grid.reload()
 
 
@@ -350,6 +596,9 @@ class DestructibleWall(Wall):
 
 class Robot(GridObject):
     """Robot class"""
+    # Set to True when the robot needs self.player, the nearest live player
+    targets_player = False
+
     def __init__(self, window, grid, pos, reload_grid=True):
         super().__init__(window, grid, pos, reload_grid)
         self.attacks = True
@@ -359,33 +608,14 @@ class Robot(GridObject):
     def get_image(self):
         return constants.robot_image
 
-    def move(self):
-        """Move robot"""
-        possible_places = []
-        for p in [[self.gridpos[0] + 1, self.gridpos[1]],
-                  [self.gridpos[0] - 1, self.gridpos[1]],
-                  [self.gridpos[0], self.gridpos[1] + 1],
-                  [self.gridpos[0], self.gridpos[1] - 1]]:
-            el = self.grid.get_element(p)
-            if isinstance(el, Player) and self.attacks:
-                el.attack()
-            elif (el is None and p[0] >= 0 and p[1] >= 0 and
-                  p[0] * constants.sprite_size < constants.dimensions[0] and
-                  p[1] * constants.sprite_size < constants.dimensions[1]):
-                possible_places.append(p)
-
-        if len(possible_places) > 0:
-            new_gridpos = self.choose_position(possible_places)
-            # None means not to move
-            if new_gridpos is None:
-                return
-            if not new_gridpos in possible_places:
-                print(f'choose_position returned a value ({ new_gridpos }) that is not in possible_places ({ possible_places })')
-                return
-            self.goto(new_gridpos[0] * constants.sprite_size,
-                      new_gridpos[1] * constants.sprite_size)
-            self.grid.move_element(self.gridpos, self, new_gridpos, False)
-            self.gridpos = new_gridpos
+    def choose_position(self, possible_places):
+        """Choose where to go among possible_places
+        Return None not to move"""
+        return None
+
+    def on_move(self, old_gridpos):
+        """Called by Level.move_robots once the robot has moved"""
+        pass
 
     def on_explode(self):
         self.exploded = True
@@ -401,33 +631,41 @@ class RandomRobot(Robot):
 class OrientationRobot(Robot):
     """OrientationRobot class
     It moves in the player direction"""
+    targets_player = True
+
     def __init__(self, window, grid, pos, player=None, reload_grid=True):
         super().__init__(window, grid, pos, reload_grid)
         self.player = player
 
     def choose_position(self, positions):
+        if self.player is None:
+            return None
         player_pos = self.player.gridpos
 
         def distance(pos):
             return (pos[0] - player_pos[0]) ** 2 + (pos[1] - player_pos[1]) ** 2
 
-        return sorted(positions, key=distance)[0]
+        return min(positions, key=distance)
 
 
 class TimidRobot(Robot):
     """TimidRobot class
     It fears player"""
+    targets_player = True
+
     def __init__(self, window, grid, pos, player=None, reload_grid=True):
         super().__init__(window, grid, pos, reload_grid)
         self.player = player
 
     def choose_position(self, positions):
+        if self.player is None:
+            return None
         player_pos = self.player.gridpos
 
         def distance(pos):
             return (pos[0] - player_pos[0]) ** 2 + (pos[1] - player_pos[1]) ** 2
 
-        return sorted(positions, key=distance)[-1]
+        return max(positions, key=distance)
 
 
 class PathRobot(Robot):
@@ -439,55 +677,72 @@ class PathRobot(Robot):
         self.index_change = 1
         self.path = path
 
+    @property
+    def path(self):
+        return self._path
+
+    @path.setter
+    def path(self, path):
+        """Set the path
+        The index of each position is stored so that the progress along the
+        path never needs to be searched"""
+        self._path = path
+        self.path_indexes = {}
+        for i, p in enumerate(path or []):
+            self.path_indexes.setdefault(tuple(p), i)
+        self.path_index = self.path_indexes.get(tuple(self.gridpos))
+
     def choose_position(self, possible_places):
-        if list(self.gridpos) in self.path:
-            current_pos_index = self.path.index(list(self.gridpos))
-            next_pos_index = current_pos_index + self.index_change
+        if self.path_index is not None:
+            next_pos_index = self.path_index + self.index_change
             if next_pos_index == len(self.path) or next_pos_index < 0:
                 next_pos_index -= self.index_change * 2
                 self.index_change = -self.index_change
+                if not 0 <= next_pos_index < len(self.path):
+                    # The path is a single position
+                    return None
             next_pos = self.path[next_pos_index]
             if next_pos not in possible_places:
                 if self.last_pos in possible_places:
-                    next_pos = self.last_pos
-                    self.last_pos = self.gridpos
-                    return next_pos
+                    return self.last_pos
                 else:
                     # robot can't move
                     return None
             else:
-                self.last_pos = self.gridpos
                 return next_pos
         else:
             def distance(pos):
                 return (pos[0] - self.path[0][0]) ** 2 + (pos[1] - self.path[0][1]) ** 2
 
-            return sorted(possible_places, key=distance)[0]
+            return min(possible_places, key=distance)
+
+    def on_move(self, old_gridpos):
+        if self.path_index is not None:
+            self.last_pos = old_gridpos
+        self.path_index = self.path_indexes.get(tuple(self.gridpos))
 
 
 class RandomPathRobot(PathRobot):
     def __init__(self, window, grid, pos, reload_grid=True):
-        super().__init__(window, grid, pos, reload_grid)
+        super().__init__(window, grid, pos, reload_grid=reload_grid)
         self.create_path()
 
     def create_path(self):
         creating_path_pos = self.gridpos
-        self.path = [list(self.gridpos)]
+        path = [list(self.gridpos)]
         for i in range(random.randint(2, 10)):
             possible_places = []
             for p in [[creating_path_pos[0] + 1, creating_path_pos[1]],
                       [creating_path_pos[0] - 1, creating_path_pos[1]],
                       [creating_path_pos[0], creating_path_pos[1] + 1],
                       [creating_path_pos[0], creating_path_pos[1] - 1]]:
-                el = self.grid.get_element(p)
-                if (el is None and p[0] >= 0 and p[1] >= 0 and
-                    p[0] * constants.sprite_size < constants.dimensions[0] and
-                    p[1] * constants.sprite_size < constants.dimensions[1]):
+                if self.grid.get_element(p) is None and self.grid.in_grid(p):
                     possible_places.append(p)
 
-            possible_places_not_in_path = [ p for p in possible_places if p not in self.path ]
+            possible_places_not_in_path = [ p for p in possible_places if p not in path ]
             if len(possible_places_not_in_path) == 0:
                 break
             else:
                 creating_path_pos = random.choice(possible_places_not_in_path)
-                self.path.append(list(creating_path_pos))
+                path.append(list(creating_path_pos))
+        self.path = path
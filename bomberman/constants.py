@@ -8,6 +8,9 @@ background_color = [128, 128, 128]
 
 level_file = 'level.json'
 
+# Time from launch to the first frame of the level, in seconds
+cold_start_target = 0.5
+
 sprite_size = 50
 
 player_image = 'images/player.png'
@@ -18,9 +21,53 @@ destroyable_wall_image = 'images/destroyable_wall.png'
 robot_image = 'images/robot.png'
 goal_image = 'images/goal.png'
 game_over_image = 'images/game_over.png'
+game_over_position = [0, 181]
 
 robot_move_delay = 1.0
 
+# Actions of the players: up, down, left, right or bomb. Keys are
+# KeyboardEvent.code values. Players without keys can be remote.
+key_bindings = [
+    {'ArrowUp': 'up', 'ArrowDown': 'down', 'ArrowLeft': 'left', 'ArrowRight': 'right', 'Space': 'bomb'},
+    {'KeyW': 'up', 'KeyS': 'down', 'KeyA': 'left', 'KeyD': 'right', 'KeyX': 'bomb'},
+]
+
+# Bots (players marked with * in levels) plan their next action every
+# bot_decision_delay seconds, with a beam search bot_search_depth decisions
+# deep keeping the bot_beam_width best states, within bot_time_budget seconds.
+# With bot_processes, the search runs in that many processes.
+bot_decision_delay = 0.25
+bot_search_depth = 6
+bot_beam_width = 8
+bot_time_budget = 0.05
+bot_processes = None
+# Cost of going through a destructible wall in the bots' path finding
+bot_wall_cost = 4
+
+# Tick budgets in seconds, by stage. A tick taking longer, or a timer running
+# more than tick_budgets['late'] seconds late, is an overrun
+tick_budgets = {
+    'timer': 0.02,
+    'robots': 0.03,
+    'bot': bot_time_budget + 0.03,
+    'render': 0.02,
+    'late': 0.05,
+}
+# The load is the moving average of the overruns, from 0 to 1. Over
+# overload_threshold, the game is overloaded until the load falls under half
+# of it. Overloaded, the grid is redrawn every overload_redraw_interval
+# seconds at most, the pygame window shows one frame out of
+# overload_frame_skip and the bots search half as deep
+overload_smoothing = 0.1
+overload_threshold = 0.3
+overload_redraw_interval = 0.1
+overload_frame_skip = 2
+
+frame_rate = 30
+
+# Port of the remote players server (on localhost), None to disable it
+remote_port = None
+
 default_hp = 3
 
 bomb_explosion_delay = 2.0
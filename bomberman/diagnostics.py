@@ -0,0 +1,53 @@
+#! /usr/bin/env python3
+"""Memory diagnostics
+Allocations are only traced when tracemalloc is running, e.g. when python is
+launched with -X tracemalloc"""
+
+import gc
+import tracemalloc
+from collections import Counter
+
+from .display import GridObject
+
+
+def live_entities():
+    """Count the GridObject instances still alive, by class"""
+    gc.collect()
+    return Counter(type(o).__name__ for o in gc.get_objects() if isinstance(o, GridObject))
+
+
+def memory_report(grid, top=10):
+    """Return a dict describing the memory used by the game
+    entities: live GridObject instances by class
+    grid_entities: GridObject instances in the grid by class
+    pending_timers: timers which have not run yet
+    retained_surfaces: images loaded by the window
+    With tracemalloc, also the traced memory and the top allocations"""
+    report = {
+        'entities': dict(live_entities()),
+        'grid_entities': dict(Counter(type(el).__name__ for el in list(grid.data.values()))),
+        'pending_timers': len(grid.all_timers),
+        'retained_surfaces': len(grid.window.images),
+    }
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        report['traced_memory'] = current
+        report['traced_memory_peak'] = peak
+        statistics = tracemalloc.take_snapshot().statistics('lineno')
+        report['top_allocations'] = [str(stat) for stat in statistics[:top]]
+    return report
+
+
+def format_memory_report(report):
+    """Return a memory report as text"""
+    lines = ['Live entities:']
+    for name, count in sorted(report['entities'].items()):
+        lines.append(f'  { name }: { count } ({ report["grid_entities"].get(name, 0) } in grid)')
+    lines.append(f'Pending timers: { report["pending_timers"] }')
+    lines.append(f'Retained surfaces: { report["retained_surfaces"] }')
+    if 'traced_memory' in report:
+        lines.append(f'Traced memory: { report["traced_memory"] / 1024:.1f} KiB '
+                     f'(peak: { report["traced_memory_peak"] / 1024:.1f} KiB)')
+        lines.append('Top allocations:')
+        lines.extend(f'  { stat }' for stat in report['top_allocations'])
+    return '\n'.join(lines)
@@ -1,30 +1,105 @@
 #! /usr/bin/env python3
+"""Backend selection
+The backend (pygame, brython or headless) is only imported when a window or a
+timer is first created, so importing the game does not import pygame"""
 
-try:
-    import browser
-    backend = 'brython'
-except ImportError:
-    backend = 'pygame'
-
-if backend == 'pygame':
-    from .backend.pygame.display import game_over, GridObject, Window
-    from threading import Timer
-else:
-    import bomberman.backend.brython.display as display
-    game_over = display.game_over
-    GridObject = display.GridObject
-    Window = display.Window
-
-    from browser.timer import clear_timeout, set_timeout
-
-    class Timer:
-        def __init__(self, interval, function):
-            self.interval = interval
-            self.function = function
-            self._tid = None
-
-        def start(self):
-            self._tid = set_timeout(self.function, self.interval * 1000)
-
-        def cancel(self):
-            clear_timeout(self._tid)
+import importlib
+import os
+
+from . import constants
+
+backends = ['pygame', 'brython', 'headless']
+
+backend = None
+_backend_module = None
+
+
+def use_backend(name):
+    """Select the backend
+    Must be called before the first window or timer is created"""
+    global backend
+    if name not in backends:
+        raise ValueError(f'Unknown backend { name } (choose among { ", ".join(backends) })')
+    if _backend_module is not None and name != backend:
+        raise RuntimeError(f'Backend { backend } is already loaded')
+    backend = name
+
+
+def detect_backend():
+    """Return the backend to use when none was selected
+    BOMBERMAN_BACKEND environment variable if set, else brython in a browser
+    (headless in a web worker) and pygame otherwise"""
+    name = os.environ.get('BOMBERMAN_BACKEND')
+    if name is not None:
+        return name
+    try:
+        import browser
+    except ImportError:
+        return 'pygame'
+    # Nothing can be drawn from a web worker
+    return 'headless' if browser.is_webworker else 'brython'
+
+
+def get_backend():
+    """Return the backend display module, importing it on first call"""
+    global _backend_module
+    if _backend_module is None:
+        if backend is None:
+            use_backend(detect_backend())
+        _backend_module = importlib.import_module(f'.backend.{ backend }.display', __package__)
+    return _backend_module
+
+
+def Window(*args, **kwargs):
+    """Create the window of the backend"""
+    return get_backend().Window(*args, **kwargs)
+
+
+def Timer(interval, function):
+    """Create a timer of the backend
+    Same interface as threading.Timer"""
+    return get_backend().Timer(interval, function)
+
+
+class GridObject:
+    """GridObject class
+    It is the class of any object in the grid. Its image is drawn by the
+    window, which loads it on first use"""
+    def __init__(self, window, grid, pos, reload_grid=True):
+        el = grid.get_element(pos)
+        # Create a GridObject where there is already a Wall is impossible
+        if el is not None and not el.deletable:
+            self.accepted = False
+            return
+        else:
+            self.accepted = True
+
+        self.grid = grid
+        self.gridpos = pos
+        pos = [ p * constants.sprite_size for p in pos ]
+        self.pos = pos
+        self.window = window
+        self.deletable = True
+        grid.add_element(self.gridpos, self, reload_grid)
+
+    def move_obj(self, x, y):
+        self.pos = [self.pos[0] + x, self.pos[1] + y]
+
+    def goto(self, x, y):
+        self.pos = [x, y]
+
+    def display(self):
+        """Display self"""
+        self.window.draw(self.get_image(), self.pos)
+
+    def delete(self):
+        pass
+
+def game_over(window, grid, player):
+    """When called, show the constants.game_over_image image"""
+    grid.cancel_timers()
+    grid.data = {}
+    grid.reload(True)
+    player.continue_ = False
+    window.fill(constants.background_color)
+    window.draw(constants.game_over_image, constants.game_over_position)
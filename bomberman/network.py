@@ -0,0 +1,80 @@
+#! /usr/bin/env python3
+"""Remote players
+InputServer listens on a local socket. Each connection controls a player
+which is not bound to keys: the server answers 'player <number>' (or 'full')
+then reads one action per line: up, down, left, right or bomb"""
+
+import selectors
+import socket
+
+from . import constants
+
+
+class InputServer:
+    """InputServer class
+    It gives the inputs of the remote players to a PlayerRegistry"""
+    def __init__(self, registry, port=None, host='127.0.0.1'):
+        self.registry = registry
+        self.selector = selectors.DefaultSelector()
+        self.server = socket.create_server((host, port if port is not None else constants.remote_port))
+        self.server.setblocking(False)
+        self.selector.register(self.server, selectors.EVENT_READ)
+        # Socket -> [player number, incomplete line]
+        self.connections = {}
+
+    @property
+    def address(self):
+        return self.server.getsockname()
+
+    def poll(self):
+        """Handle new connections and inputs without blocking
+        Called from the main loop"""
+        for key, events in self.selector.select(0):
+            if key.fileobj is self.server:
+                self.accept()
+            else:
+                self.read(key.fileobj)
+
+    def accept(self):
+        try:
+            connection, address = self.server.accept()
+        except BlockingIOError:
+            return
+        number = self.registry.claim()
+        if number is None:
+            connection.sendall(b'full\n')
+            connection.close()
+            return
+        connection.sendall(f'player { number }\n'.encode())
+        connection.setblocking(False)
+        self.connections[connection] = [number, b'']
+        self.selector.register(connection, selectors.EVENT_READ)
+
+    def read(self, connection):
+        try:
+            data = connection.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self.disconnect(connection)
+            return
+        number, rest = self.connections[connection]
+        *lines, rest = (rest + data).split(b'\n')
+        self.connections[connection][1] = rest
+        for line in lines:
+            self.registry.act(number, line.decode(errors='replace').strip())
+
+    def disconnect(self, connection):
+        number, rest = self.connections.pop(connection)
+        self.registry.release(number)
+        self.selector.unregister(connection)
+        connection.close()
+
+    def close(self):
+        for connection in list(self.connections):
+            self.disconnect(connection)
+        self.selector.unregister(self.server)
+        self.server.close()
+        self.selector.close()
@@ -0,0 +1,97 @@
+#! /usr/bin/env python3
+
+import json
+import sys
+import time
+
+from . import common, constants, display
+
+class Simulation:
+    """Simulation class
+    It runs a level without drawing it. The changes of the grid are given to
+    send as dicts:
+    {'set': [[x, y, image], ...], 'clear': [[x, y], ...], 'over': bool}
+    with 'size': [width, height] in pixels when the level changes it"""
+    def __init__(self, send):
+        self.send = send
+        self.window = display.Window(self.changed)
+        self.grid = common.Grid(self.window)
+        self.level = None
+        self.players = []
+        self.registry = None
+        # Image of each position, as last sent
+        self.cells = {}
+        self.over = False
+        self.size = None
+        self.started = False
+        self.flush_timer = None
+
+    def start(self, file=None, data=None):
+        """Load and render the level"""
+        self.level = common.Level(self.window, self.grid, file, data)
+        self.level.render()
+        self.players = self.level.players
+        self.registry = common.PlayerRegistry(self.players)
+        # The whole level is sent at once
+        self.started = True
+        self.flush()
+
+    def changed(self):
+        """Called each time the grid is redrawn
+        The changes are sent once, when the current tick is over"""
+        if self.started and self.flush_timer is None:
+            self.flush_timer = display.Timer(0, self.flush)
+            self.flush_timer.start()
+
+    def diff(self):
+        """Return the changes since the last diff"""
+        cells = {pos: el.get_image() for pos, el in list(self.grid.data.items())}
+        changes = {
+            'set': [[pos[0], pos[1], image] for pos, image in cells.items()
+                    if self.cells.get(pos) != image],
+            'clear': [list(pos) for pos in self.cells if pos not in cells],
+            'over': not all(p.continue_ for p in self.players),
+        }
+        self.cells = cells
+        if self.window.dimensions != self.size:
+            self.size = changes['size'] = self.window.dimensions
+        return changes
+
+    def flush(self):
+        """Send the changes, if any"""
+        self.flush_timer = None
+        changes = self.diff()
+        if changes['set'] or changes['clear'] or changes['over'] != self.over or 'size' in changes:
+            self.over = changes['over']
+            self.send(changes)
+
+    def key(self, code):
+        """Handle a key press"""
+        if self.over or self.registry is None:
+            return
+        self.registry.key(code)
+
+    def stop(self):
+        if self.level is not None:
+            for bot in self.level.bots:
+                bot.stop()
+        self.grid.cancel_timers()
+
+
+def main():
+    """Run the simulation without browser and print the changes
+    The key codes given as arguments are pressed one by one, every
+    constants.robot_move_delay seconds"""
+    # Stand-in for the web worker: nothing is drawn
+    display.use_backend('headless')
+    simulation = Simulation(lambda changes: print(json.dumps(changes)))
+    simulation.start(constants.level_file)
+    for code in sys.argv[1:]:
+        time.sleep(constants.robot_move_delay)
+        simulation.key(code)
+    time.sleep(constants.robot_move_delay)
+    simulation.stop()
+
+
+if __name__ == '__main__':
+    main()
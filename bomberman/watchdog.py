@@ -0,0 +1,86 @@
+#! /usr/bin/env python3
+"""Tick budget watchdog
+The events are logged by the bomberman.watchdog logger as JSON messages, and
+as a dict in the event attribute of the log records"""
+
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from . import constants
+
+logger = logging.getLogger(__name__)
+
+
+class Watchdog:
+    """Watchdog class
+    It measures the ticks of the game against constants.tick_budgets. The load
+    is the moving average of the overruns: over constants.overload_threshold,
+    the game is overloaded and optional work is shed"""
+    def __init__(self, budgets=None):
+        self.budgets = budgets or constants.tick_budgets
+        self.load = 0.0
+        self.overloaded = False
+        self.overloaded_since = None
+        self.overruns = Counter()
+        self.last_redraw = 0.0
+        # Time of the nested measurements of the blocks running in the thread
+        self.local = threading.local()
+
+    @contextmanager
+    def measure(self, stage, late=0.0):
+        """Record the time taken by the block
+        late is how late the block started, for timers. Measurements nested
+        in the block, such as a redraw in a timer, are not counted twice"""
+        stack = getattr(self.local, 'nested', None)
+        if stack is None:
+            stack = self.local.nested = []
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += duration
+            self.record(stage, duration - nested, late)
+
+    def record(self, stage, duration, late=0.0):
+        """Record a tick of stage which took duration seconds"""
+        budget = self.budgets.get(stage)
+        overrun = (budget is not None and duration > budget) or late > self.budgets['late']
+        self.load += (overrun - self.load) * constants.overload_smoothing
+        if overrun:
+            self.overruns[stage] += 1
+            self.log(logging.DEBUG, 'overrun', stage=stage, duration=duration, budget=budget,
+                     late=late)
+
+        if not self.overloaded and self.load > constants.overload_threshold:
+            self.overloaded = True
+            self.overloaded_since = time.monotonic()
+            self.log(logging.WARNING, 'overload', stage=stage, overruns=dict(self.overruns))
+        elif self.overloaded and self.load < constants.overload_threshold / 2:
+            # Half the threshold, so that the game does not flip in and out
+            self.overloaded = False
+            self.log(logging.INFO, 'recovered', overruns=dict(self.overruns),
+                     overloaded_for=time.monotonic() - self.overloaded_since)
+            self.overruns.clear()
+
+    def log(self, level, name, **fields):
+        event = {'event': name, 'load': self.load, **fields}
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps(event), extra={'event': event})
+
+    def redraw_delay(self):
+        """Return how long to wait before the next redraw, 0 to redraw now
+        Overloaded, the grid is redrawn every constants.overload_redraw_interval"""
+        if not self.overloaded:
+            return 0
+        return max(0, self.last_redraw + constants.overload_redraw_interval - time.monotonic())
+
+    def redrawn(self):
+        self.last_redraw = time.monotonic()
@@ -1,10 +1,12 @@
-from browser import document, html
-from browser.timer import set_timeout, request_animation_frame
+from browser import bind, document, worker
+from browser.timer import request_animation_frame
 
-import time
+import json
 
-from bomberman import constants, common, display
+from bomberman import constants, display
+from bomberman.backend.brython.display import load_image
 
+display.use_backend('brython')
 window = display.Window()
 
 canvas = window.canvas
@@ -16,43 +18,66 @@ window.fill(constants.background_color)
 document.select('title')[0].clear()
 document.select('title')[0] <= constants.title
 
-grid = common.Grid(window)
+# The game runs in the "simulation" web worker (brython_worker.py). It sends
+# the changes of the grid, which are drawn on the next animation frame.
+simulation = worker.Worker('simulation')
 
-level = common.Level(window, grid, constants.level_file)
-level.render()
-players = level.players
+# Image of each position of the grid
+cells = {}
+# Positions to draw on the next frame
+dirty = set()
+redraw_all = True
+over = False
+
+def image_loaded():
+    global redraw_all
+    redraw_all = True
+
+for filename in [constants.player_image, constants.bomb_image, constants.fire_image,
+                 constants.wall_image, constants.destroyable_wall_image,
+                 constants.robot_image, constants.goal_image, constants.game_over_image]:
+    load_image(filename, image_loaded)
+
+@bind(simulation, 'message')
+def message(event):
+    global over, redraw_all
+    changes = json.loads(event.data)
+    if 'size' in changes:
+        # The canvas is sized for the level
+        window.resize(changes['size'])
+        redraw_all = True
+    for x, y, filename in changes['set']:
+        cells[(x, y)] = filename
+        dirty.add((x, y))
+    for x, y in changes['clear']:
+        cells.pop((x, y), None)
+        dirty.add((x, y))
+    over = changes['over']
+
+def render(timestamp):
+    global redraw_all
+    if over:
+        window.fill(constants.background_color)
+        window.draw(constants.game_over_image, constants.game_over_position)
+        return
+
+    if redraw_all:
+        window.fill(constants.background_color)
+        dirty.update(cells)
+        redraw_all = False
+    for pos in dirty:
+        if pos in cells:
+            window.draw_cell(pos, cells[pos])
+        else:
+            window.clear_cell(pos)
+    dirty.clear()
+    request_animation_frame(render)
 
 def keydown(event):
-    print(event.key, repr(event.code), players)
-    print(players[0], players[0].gridpos)
-
-    if event.code == 'ArrowRight':
-        players[0].move(1, 0)
-    elif event.code == 'KeyD':
-        if len(players) > 1:
-            players[1].move(1, 0)
-    elif event.code == 'ArrowLeft':
-        players[0].move(-1, 0)
-    elif event.code == 'KeyA':
-        if len(players) > 1:
-           players[1].move(-1, 0)
-    elif event.code == 'ArrowUp':
-        players[0].move(0, -1)
-    elif event.code == 'KeyW':
-        if len(players) > 1:
-            players[1].move(0, -1)
-    elif event.code == 'ArrowDown':
-        players[0].move(0, 1)
-    elif event.code == 'KeyS':
-        if len(players) > 1:
-            players[1].move(0, 1)
-    elif event.code == 'Space':
-        players[0].put_bomb()
-    elif event.code == 'KeyX':
-        if len(players) > 1:
-            players[1].put_bomb()
-    elif event.code == 'KeyP':
-        from interpreter import Inspector
-        print(Inspector())
+    simulation.send(json.dumps({'type': 'key', 'code': event.code}))
+
+with open(constants.level_file) as f:
+    simulation.send(json.dumps({'type': 'start', 'level': f.read()}))
 
+request_animation_frame(render)
 document.bind('keydown', keydown)
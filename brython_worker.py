@@ -0,0 +1,16 @@
+from browser import bind, self
+
+import json
+
+from bomberman.simulation import Simulation
+
+# Runs in the "simulation" web worker, see brython_main.py
+simulation = Simulation(lambda changes: self.send(json.dumps(changes)))
+
+@bind(self, 'message')
+def message(event):
+    message = json.loads(event.data)
+    if message['type'] == 'start':
+        simulation.start(data=message['level'])
+    elif message['type'] == 'key':
+        simulation.key(message['code'])
@@ -1,4 +1,7 @@
 #! /usr/bin/env python3
 
+import time
+start_time = time.perf_counter()
+
 from bomberman.backend.pygame.main import main
-main()
+main(start_time)
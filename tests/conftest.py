@@ -0,0 +1,30 @@
+import json
+
+import pytest
+
+from bomberman import display
+
+display.use_backend('headless')
+
+from bomberman import common
+
+
+@pytest.fixture
+def make_level():
+    """Return a function rendering a level from its map and robots data
+    The timers of the levels are cancelled after the test"""
+    levels = []
+
+    def make(level_map, robots=None):
+        window = display.Window()
+        grid = common.Grid(window)
+        level = common.Level(window, grid, data=json.dumps({'map': level_map, 'robots': robots or {}}))
+        level.render()
+        levels.append(level)
+        return level
+
+    yield make
+    for level in levels:
+        for bot in level.bots:
+            bot.stop()
+        level.grid.cancel_timers()
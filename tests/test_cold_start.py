@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+from bomberman import constants
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in a new interpreter, so that the imports are measured
+COLD_START = '''
+import time
+start = time.perf_counter()
+
+from bomberman import display
+display.use_backend('headless')
+from bomberman import common, constants
+
+window = display.Window()
+grid = common.Grid(window)
+level = common.Level(window, grid, constants.level_file)
+level.render()
+print(time.perf_counter() - start)
+grid.cancel_timers()
+'''
+
+
+def test_cold_start():
+    result = subprocess.run([sys.executable, '-c', COLD_START], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    assert float(result.stdout) < constants.cold_start_target
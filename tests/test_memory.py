@@ -0,0 +1,41 @@
+import gc
+import time
+import weakref
+
+from bomberman import common, constants
+
+
+def test_timers_and_destroyed_entities_are_released(make_level, monkeypatch):
+    monkeypatch.setattr(constants, 'bomb_explosion_delay', 0.05)
+    monkeypatch.setattr(constants, 'bomb_explosion_duration', 0.05)
+    monkeypatch.setattr(constants, 'robot_move_delay', 0.01)
+    # The robot is walled in
+    level = make_level(['. :', '   ', '   ', '###', '#a#'], {'a': {'type': 'random'}})
+    grid = level.grid
+    wall = weakref.ref(grid.get_element([2, 0]))
+
+    player = level.players[0]
+    player.put_bomb()
+    player.move(0, 1)
+    player.move(1, 0)
+    bomb = weakref.ref(grid.get_element([0, 0]))
+    assert isinstance(bomb(), common.Bomb)
+
+    # Fuse, explosion, fires and many robot ticks
+    time.sleep(0.4)
+    assert player.continue_
+    assert grid.get_element([2, 0]) is None
+    # Only the next robot tick is left
+    assert len(grid.all_timers) <= 1
+    gc.collect()
+    assert wall() is None
+    assert bomb() is None
+
+
+def test_stopped_bots_forget_their_timer(make_level):
+    level = make_level(['*  +'])
+    bot = level.bots[0]
+    timer = bot.timer
+    assert timer in level.grid.all_timers
+    bot.stop()
+    assert timer not in level.grid.all_timers
@@ -0,0 +1,73 @@
+import random
+from types import SimpleNamespace
+
+from bomberman.common import PlayerIndex
+
+
+def distance(player, position):
+    return (player.gridpos[0] - position[0]) ** 2 + (player.gridpos[1] - position[1]) ** 2
+
+
+def check(players, size, robots, linear_players=PlayerIndex.linear_players):
+    index = PlayerIndex(players, size)
+    index.linear_players = linear_players
+    for position in robots:
+        nearest = index.nearest(position)
+        assert distance(nearest, position) == min(distance(p, position) for p in players)
+
+
+def test_random_layouts():
+    rng = random.Random(0)
+    for _ in range(200):
+        size = (rng.randint(1, 60), rng.randint(1, 60))
+        players = [SimpleNamespace(gridpos=[rng.randrange(size[0]), rng.randrange(size[1])])
+                   for _ in range(rng.randint(1, 100))]
+        robots = [(rng.randrange(size[0]), rng.randrange(size[1])) for _ in range(20)]
+        check(players, size, robots)
+        # The spatial hash itself
+        check(players, size, robots, 0)
+
+
+class CountingIndex(PlayerIndex):
+    """PlayerIndex counting the rings searched and the buckets visited"""
+    linear_players = 0
+
+    def __init__(self, players, size):
+        super().__init__(players, size)
+        self.rings = 0
+        self.visited = 0
+
+    def ring(self, bx, by, ring):
+        keys = super().ring(bx, by, ring)
+        self.rings += 1
+        self.visited += len(keys)
+        return keys
+
+
+def check_cost(players, size, robots):
+    """The index must not cost more than comparing every player"""
+    index = CountingIndex(players, size)
+    for position in robots:
+        index.nearest(position)
+    assert index.visited <= len(players) * len(robots)
+    # A few rings per robot, not one per cell between the robot and the players
+    assert index.rings <= 5 * len(robots)
+
+
+def test_clustered_players():
+    rng = random.Random(1)
+    players = [SimpleNamespace(gridpos=[x, y]) for x in range(4) for y in range(4)]
+    robots = [(rng.randrange(80), rng.randrange(80)) for _ in range(500)]
+    check(players, (80, 80), robots, 0)
+    check_cost(players, (80, 80), robots)
+
+
+def test_distant_robots():
+    players = [SimpleNamespace(gridpos=[0, 0]), SimpleNamespace(gridpos=[1, 0])]
+    robots = [(199 - i % 20, 199 - i // 20) for i in range(500)]
+    check(players, (200, 200), robots, 0)
+    check_cost(players, (200, 200), robots)
+
+
+def test_no_players():
+    assert PlayerIndex([], (15, 15)).nearest((3, 4)) is None
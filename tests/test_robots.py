@@ -0,0 +1,40 @@
+from bomberman import common
+
+
+def move_robots(level):
+    """Run one robot tick without the robot timer"""
+    level.grid.cancel_timers()
+    level.move_robots()
+    level.grid.cancel_timers()
+
+
+def test_game_over_stops_the_attacks(make_level):
+    level = make_level([' a ', 'a.a', ' a '], {'a': {'type': 'random'}})
+    player = level.players[0]
+    player.hp = 1
+    move_robots(level)
+    assert player.hp == 0
+    assert not player.continue_
+    assert level.grid.data == {}
+
+
+def test_first_robot_gets_a_wanted_cell(make_level):
+    level = make_level(['#a#', '# #', '#b#'], {'a': {'type': 'random'}, 'b': {'type': 'random'}})
+    a, b = level.robots
+    move_robots(level)
+    assert list(a.gridpos) == [1, 1]
+    assert list(b.gridpos) == [1, 2]
+    assert level.grid.get_element([1, 1]) is a
+    assert level.grid.get_element([1, 2]) is b
+
+
+def test_path_robot_reverses_at_the_end_of_its_path(make_level):
+    level = make_level(['p  '], {'p': {'type': 'path', 'path': [[0, 0], [1, 0], [2, 0]]}})
+    robot = level.robots[0]
+    positions = []
+    for i in range(6):
+        move_robots(level)
+        positions.append(list(robot.gridpos))
+        assert robot.path_index == robot.path.index(robot.gridpos)
+    assert positions == [[1, 0], [2, 0], [1, 0], [0, 0], [1, 0], [2, 0]]
+    assert isinstance(level.grid.get_element([2, 0]), common.PathRobot)
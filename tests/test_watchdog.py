@@ -0,0 +1,94 @@
+import logging
+import threading
+
+import pytest
+
+from bomberman import constants, watchdog
+from bomberman.watchdog import Watchdog
+
+
+class Clock:
+    """Stand-in for time.perf_counter and time.monotonic"""
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(watchdog.time, 'perf_counter', clock)
+    monkeypatch.setattr(watchdog.time, 'monotonic', clock)
+    return clock
+
+
+def test_overload_and_recovery(caplog):
+    caplog.set_level(logging.INFO, logger='bomberman.watchdog')
+    dog = Watchdog({'robots': 0.01, 'late': 1})
+    dog.record('robots', 0.02)
+    # One overrun is not an overload
+    assert not dog.overloaded
+    while not dog.overloaded:
+        dog.record('robots', 0.02)
+    assert dog.load > constants.overload_threshold
+
+    # The game stays overloaded until the load is under half the threshold
+    under_threshold = False
+    while dog.load >= constants.overload_threshold / 2:
+        assert dog.overloaded
+        under_threshold = under_threshold or dog.load < constants.overload_threshold
+        dog.record('robots', 0.001)
+    assert under_threshold
+    assert not dog.overloaded
+
+    events = [record.event['event'] for record in caplog.records]
+    assert events == ['overload', 'recovered']
+
+
+def test_late_timers_are_overruns():
+    dog = Watchdog({'timer': 0.01, 'late': 0.05})
+    dog.record('timer', 0.001, late=0.1)
+    assert dog.overruns == {'timer': 1}
+    dog.record(None, 0.5)
+    assert dog.overruns == {'timer': 1}
+
+
+def test_nested_measurements_are_not_counted_twice(clock):
+    dog = Watchdog({'robots': 0.05, 'render': 0.05, 'late': 1})
+    records = []
+    dog.record = lambda stage, duration, late=0.0: records.append((stage, duration))
+    with dog.measure('robots'):
+        clock.now += 0.02
+        with dog.measure('render'):
+            clock.now += 0.06
+    assert records == [('render', pytest.approx(0.06)), ('robots', pytest.approx(0.02))]
+
+
+def test_measurements_of_other_threads_are_not_nested(clock):
+    dog = Watchdog({'timer': 0.05, 'late': 1})
+    records = []
+    dog.record = lambda stage, duration, late=0.0: records.append((stage, duration))
+
+    def timer():
+        with dog.measure('timer'):
+            clock.now += 0.03
+
+    with dog.measure('robots'):
+        thread = threading.Thread(target=timer)
+        thread.start()
+        thread.join()
+    assert records == [('timer', pytest.approx(0.03)), ('robots', pytest.approx(0.03))]
+
+
+def test_redraw_delay(clock):
+    dog = Watchdog()
+    dog.redrawn()
+    assert dog.redraw_delay() == 0
+    dog.overloaded = True
+    assert dog.redraw_delay() == pytest.approx(constants.overload_redraw_interval)
+    clock.now += constants.overload_redraw_interval / 2
+    assert dog.redraw_delay() == pytest.approx(constants.overload_redraw_interval / 2)
+    clock.now += constants.overload_redraw_interval
+    assert dog.redraw_delay() == 0